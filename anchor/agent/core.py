@@ -1,9 +1,10 @@
 import logging
 import time
-from typing import Any
+from typing import Any, Optional
 import json
 
-from openai import OpenAI
+import httpx
+from openai import OpenAI, RateLimitError
 
 from .prompt import build_prompt
 from .tools import TOOL_MAP, apply_llm_actions
@@ -13,11 +14,28 @@ from ..constants import (
     DEFAULT_MAX_ITERATIONS,
     DEFAULT_MODEL,
     DEFAULT_MEMORY_ITEMS,
-    DEFAULT_AGENT_SLEEP,
+    DEFAULT_PROMPT_WINDOW,
+    DEFAULT_RATE_LIMIT_RETRIES,
+    DEFAULT_RATE_LIMIT_MAX_BACKOFF,
 )
 
 LOGGER = logging.getLogger("anchor.agent")
-LOGGER.setLevel(logging.DEBUG)
+
+_LLM: Optional[OpenAI] = None
+
+
+def _shared_llm() -> OpenAI:
+    """Return the process-wide OpenAI client so agent runs reuse pooled connections."""
+    global _LLM
+    if _LLM is None:
+        _LLM = OpenAI(
+            http_client=httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=60.0),
+                timeout=httpx.Timeout(60.0, connect=5.0),
+            )
+        )
+    return _LLM
 
 
 class AnchorAgent:
@@ -27,42 +45,56 @@ class AnchorAgent:
         self.workspace = workspace
         self.max_iters = max_iters
         self.model = model
-        self.llm = OpenAI()
+        self.llm = _shared_llm()
         self.memory = Memory(max_items=DEFAULT_MEMORY_ITEMS)
+        # TOOL_MAP is static, so build the schema list once (as plain dicts for the client)
+        self._tool_schemas = [dict(t.schema) for t in TOOL_MAP.values()]
+
+    def _complete(self, prompt):
+        """Open a streamed completion, backing off only when rate-limited."""
+        for retry in range(DEFAULT_RATE_LIMIT_RETRIES + 1):
+            try:
+                return self.llm.chat.completions.create(
+                    model=self.model,
+                    messages=prompt,
+                    tools=self._tool_schemas,
+                    # Parallel tool calls are the API default whenever the model
+                    # supports them; not sending the flag keeps models without
+                    # that support (e.g. the gpt-4 snapshot) working
+                    tool_choice="auto",
+                    stream=True,
+                )
+            except RateLimitError:
+                if retry == DEFAULT_RATE_LIMIT_RETRIES:
+                    raise
+                delay = min(2 ** retry, DEFAULT_RATE_LIMIT_MAX_BACKOFF)
+                LOGGER.warning("Rate limited by OpenAI; retrying in %ss", delay)
+                time.sleep(delay)
 
     def run(self) -> bool:
         """Execute iterative loop. Returns True on success (apply + probe OK)."""
         for step in range(self.max_iters):
             LOGGER.info("\n=== Agent step %s ===", step + 1)
             observation: Any = self.workspace.snapshot()
-            LOGGER.debug("Workspace snapshot: %s", json.dumps(observation, indent=2))
+            if LOGGER.isEnabledFor(logging.DEBUG):
+                LOGGER.debug("Workspace snapshot: %s", json.dumps(observation, indent=2))
             self.memory.add(observation)
 
-            prompt = build_prompt(self.memory.latest(20))
-            LOGGER.debug("Sending prompt with %d messages", len(prompt))
-            for msg in prompt:
-                LOGGER.debug("Message [%s]: %s", msg["role"], msg["content"][:200] + "..." if len(msg["content"]) > 200 else msg["content"])
-            
-            response = self.llm.chat.completions.create(
-                model=self.model,
-                messages=prompt,
-                tools=[t.schema for t in TOOL_MAP.values()],
-                tool_choice="auto",
+            prompt = build_prompt(
+                self.memory.window(DEFAULT_PROMPT_WINDOW),
+                pinned_first=True,
+                history=self.memory.history(DEFAULT_PROMPT_WINDOW),
             )
+            if LOGGER.isEnabledFor(logging.DEBUG):
+                LOGGER.debug("Sending prompt with %d messages", len(prompt))
+                for msg in prompt:
+                    LOGGER.debug("Message [%s]: %s", msg["role"], msg["content"][:200] + "..." if len(msg["content"]) > 200 else msg["content"])
             
-            LOGGER.debug("LLM response: %s", response.model_dump_json(indent=2)[:1000] + "..." if len(response.model_dump_json()) > 1000 else response.model_dump_json())
-
-            # Extract and log agent's reasoning if present
-            for choice in response.choices:
-                if choice.message.content:
-                    LOGGER.info("Agent reasoning: %s", choice.message.content[:500])
-                if hasattr(choice.message, "tool_calls") and choice.message.tool_calls:
-                    LOGGER.info("Agent plans to use %d tools", len(choice.message.tool_calls))
-                    for call in choice.message.tool_calls:
-                        LOGGER.info("  - %s", call.function.name)
+            stream = self._complete(prompt)
 
+            # Tool calls run as they stream in; reasoning is logged once complete
             finished = apply_llm_actions(
-                response=response,
+                stream=stream,
                 workspace=self.workspace,
                 tool_map=TOOL_MAP,
                 logger=LOGGER,
@@ -72,7 +104,5 @@ class AnchorAgent:
                 LOGGER.info("Goal achieved; exiting loop.")
                 return True
 
-            time.sleep(DEFAULT_AGENT_SLEEP)
-
         LOGGER.warning("Maximum iterations reached without complete success.")
         return False 
\ No newline at end of file
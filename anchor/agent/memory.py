@@ -1,15 +1,76 @@
 from collections import deque
-from typing import Any, Deque, List
+from itertools import islice
+from typing import Any, Deque, List, Optional
 
 class Memory:
-    """Simple fixed-size memory buffer to store observations between agent steps."""
+    """Fixed-size memory buffer to store observations between agent steps.
+
+    Raw observations live in a bounded ring; anything evicted from it is kept
+    as a one-line digest in ``summary`` so the agent does not lose track of
+    errors it has already seen.
+    """
+
+    __slots__ = ("buffer", "first", "summary", "added")
 
     def __init__(self, max_items: int = 50):
         self.buffer: Deque[Any] = deque(maxlen=max_items)
+        # Initial observation, pinned so it survives eviction from the window
+        self.first: Optional[Any] = None
+        self.summary: List[str] = []
+        self.added = 0
 
     def add(self, item: Any) -> None:
+        if self.first is None:
+            self.first = item
+        if len(self.buffer) == self.buffer.maxlen:
+            step = self.added - len(self.buffer)
+            old = self.buffer.popleft()
+            if old is not self.first:
+                self.summary.append(self._digest(old, step))
         self.buffer.append(item)
+        self.added += 1
 
     def latest(self, k: int) -> List[Any]:
         """Return up to k most recent items, newest last."""
-        return list(self.buffer)[-k:] 
\ No newline at end of file
+        size = len(self.buffer)
+        return list(islice(self.buffer, max(0, size - k), size))
+
+    def window(self, k: int) -> List[Any]:
+        """Return the first item plus the k-1 most recent items, newest last."""
+        size = len(self.buffer)
+        if self.first is None or (size <= k and self.buffer[0] is self.first):
+            return self.latest(k)
+        return [self.first] + list(islice(self.buffer, max(0, size - k + 1), size))
+
+    def history(self, k: int) -> List[str]:
+        """Return digests of every observation that falls outside window(k), oldest first."""
+        size = len(self.buffer)
+        start = self.added - size  # step index of buffer[0], zero-based
+        digests = list(self.summary)
+        for offset, item in enumerate(islice(self.buffer, 0, max(0, size - k + 1))):
+            if item is not self.first:
+                digests.append(self._digest(item, start + offset))
+        return digests
+
+    @staticmethod
+    def _digest(obs: Any, step: int) -> str:
+        """Compress an observation to its return codes, plan stats and error signature."""
+        if not isinstance(obs, dict):
+            return f"step {step + 1}: {' '.join(str(obs).split())[:120]}"
+        parts = [f"step {step + 1}:"]
+        error = ""
+        validate = obs.get("validate")
+        if validate:
+            parts.append(f"validate rc={validate['returncode']}")
+            if validate["returncode"] != 0:
+                error = validate["stderr"]
+        plan = obs.get("plan")
+        if plan:
+            parts.append(f"plan rc={plan['returncode']}")
+            if plan.get("stats"):
+                parts.append(f"stats={plan['stats']}")
+            if plan["returncode"] != 0 and not error:
+                error = plan["stderr"]
+        if error:
+            parts.append(f"error: {' '.join(error.split())[:120]}")
+        return " ".join(parts)
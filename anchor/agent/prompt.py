@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Optional
+import hashlib
 import json
 
+# Hard cap on stderr tails inlined into a single observation
+MAX_STDERR_CHARS = 4000
+
 SYSTEM_MSG = """You are Anchor, an autonomous infrastructure engineer specializing in Terraform.
 
 Your mission:
@@ -48,35 +52,76 @@ Work iteratively:
 2. Then terraform validate to check syntax
 3. Then terraform plan to see what will be created
 4. Fix any errors and repeat
+
+Batching policy: when multiple independent read-only commands are needed
+(e.g. terraform validate, aws ... describe/list calls), emit them all as
+parallel tool_calls in a single response instead of one per turn. Tool calls
+are executed in the order given. Only terraform validate/show/output/version/
+providers, ls, cat and aws describe-*/list-*/get-* calls run concurrently;
+every other call (patch_file, delete_file, shell commands that edit files,
+terraform init/plan/apply, AWS writes) runs alone once all earlier calls have
+finished. A check placed after a fix in the same response therefore sees it.
 """
 
 
-def build_prompt(observations: List[Any]) -> List[Dict[str, str]]:
+def build_prompt(
+    observations: List[Any],
+    pinned_first: bool = False,
+    history: Optional[List[str]] = None,
+) -> List[Dict[str, str]]:
+    """Build chat messages from observations.
+
+    If pinned_first is set, the first observation is the initial workspace
+    snapshot kept in the window regardless of age and is labelled as such.
+    history holds one-line digests of older observations no longer in the window.
+    """
     messages: List[Dict[str, str]] = [
         {"role": "system", "content": SYSTEM_MSG},
     ]
 
+    if history:
+        messages.append({
+            "role": "system",
+            "content": "=== Compacted History ===\n" + "\n".join(history),
+        })
+
+    # (title, blob digest) -> label of the observation that first included it
+    seen: Dict[Any, str] = {}
+
+    def blob(title: str, text: str, label: str) -> str:
+        key = (title, hashlib.blake2b(text.encode(), digest_size=8).hexdigest())
+        if key in seen:
+            return f"\n{title}: <unchanged, see {seen[key]}>\n"
+        seen[key] = label
+        return f"\n{title}:\n{text}\n"
+
     # Format observations more clearly
     for idx, obs in enumerate(observations, 1):
         if isinstance(obs, dict):
             # Pretty print terraform results
-            content = f"=== Observation {idx} ===\n"
+            if pinned_first and idx == 1:
+                label = "Initial Snapshot"
+                content = "=== Initial Snapshot (pinned) ===\n"
+            else:
+                label = f"Observation {idx}"
+                content = f"=== Observation {idx} ===\n"
             
             # Include directory structure if available
             if "directory_structure" in obs:
-                content += f"\nDirectory Structure:\n{json.dumps(obs['directory_structure'], indent=2)}\n"
+                # Already a newline-separated path listing
+                content += blob("Directory Structure", obs["directory_structure"], label)
             
             # Include main.tf content if available
             if "main_tf_content" in obs:
-                content += f"\nmain.tf content:\n{obs['main_tf_content']}\n"
+                content += blob("main.tf content", obs["main_tf_content"], label)
             
             if "validate" in obs and obs["validate"]["returncode"] != 0:
-                content += f"\nValidation Error:\n{obs['validate']['stderr']}\n"
+                content += f"\nValidation Error:\n{obs['validate']['stderr'][-MAX_STDERR_CHARS:]}\n"
             
             if "plan" in obs:
                 plan = obs["plan"]
                 if plan["returncode"] != 0:
-                    content += f"\nPlan Error:\n{plan['stderr']}\n"
+                    content += f"\nPlan Error:\n{plan['stderr'][-MAX_STDERR_CHARS:]}\n"
                 elif plan.get("stats"):
                     content += f"\nPlan Summary: {json.dumps(plan['stats'])}\n"
             
@@ -1,26 +1,72 @@
+import functools
 import json
 import logging
-from pathlib import Path
-from typing import Dict, Any
+import os
+import shlex
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    # Optional: noticeably faster for the small argument payloads parsed per chunk
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 
 # In the future, import Workspace type for type hints
 
+# Terraform subcommands that talk to AWS and need destination credentials
+CREDENTIAL_TF_SUBCOMMANDS = frozenset(("plan", "apply", "destroy", "refresh", "import"))
+# run_command allowlist of read-only commands; anything else is treated as a
+# write and runs alone. Terraform subcommands that only read the configuration
+# ("providers lock"/"mirror" write and are excluded below)
+READ_ONLY_TF_SUBCOMMANDS = frozenset(("validate", "show", "output", "version", "providers"))
+# Local commands that only read the workspace
+READ_ONLY_LOCAL_COMMANDS = frozenset(("ls", "cat"))
+# Read-only terraform subcommands whose output may come from a remote backend
+# rather than the workspace files, so their results are never reused
+UNCACHED_TF_SUBCOMMANDS = frozenset(("show", "output"))
+# AWS CLI operations that only read remote state, by prefix
+READ_ONLY_AWS_PREFIXES = ("describe-", "list-", "get-")
+# (service, operation) pairs matched exactly; the second set writes local files
+READ_ONLY_AWS_OPERATIONS = frozenset((("sts", "get-caller-identity"), ("s3", "ls")))
+WRITING_AWS_OPERATIONS = frozenset((("s3api", "get-object"), ("s3api", "get-object-torrent")))
+# AWS CLI global options that take no value
+AWS_FLAG_OPTIONS = frozenset((
+    "--debug", "--no-verify-ssl", "--no-paginate", "--no-sign-request",
+    "--no-cli-pager", "--cli-auto-prompt", "--no-cli-auto-prompt",
+))
+# Upper bound on read-only tool calls executed concurrently
+MAX_PARALLEL_TOOLS = 4
+# run_command limits: wall-clock timeout (seconds) and bytes kept per output stream
+COMMAND_TIMEOUT = 30
+OUTPUT_TAIL_BYTES = 4000
+# Successful results of workspace-only reads kept by _run_cached
+RUN_CACHE_SIZE = 64
+
 class Tool:
     """Simple representation of a callable tool exposed to the LLM (OpenAI function format)."""
 
+    __slots__ = ("func", "name", "description", "schema")
+
     def __init__(self, func, name: str, description: str, parameters: Dict[str, Any]):
         self.func = func
         self.name = name
         self.description = description
-        # OpenAI expects a wrapper with type "function" and inner function object
-        self.schema = {
+        # OpenAI expects a wrapper with type "function" and inner function object.
+        # Read-only view: tools are shared across the scheduler's worker threads.
+        self.schema = MappingProxyType({
             "type": "function",
             "function": {
                 "name": name,
                 "description": description,
                 "parameters": parameters,
             },
-        }
+        })
 
     def __call__(self, *args, **kwargs):
         return self.func(*args, **kwargs)
@@ -28,55 +74,180 @@ class Tool:
 
 def patch_file(path: str, diff: str, workspace):
     """Apply a UNIX style patch string to a file in workspace."""
-    file_path = Path(workspace.root) / path
+    file_path = workspace.root_path / path
     if not file_path.exists():
         return f"Error: File {path} does not exist"
     original = file_path.read_text()
+    # Skip identical rewrites so mtime-keyed command results stay cached
+    if original == diff:
+        return f"No-op patch on {path} ({len(diff)} chars)"
     # TODO: more robust patching; for now just overwrite with diff content
     file_path.write_text(diff)
+    # Non-.tf inputs (file()/templatefile() sources) are not in the snapshot fingerprint
+    workspace.invalidate()
     return f"Patched {path} (original: {len(original)} chars, new: {len(diff)} chars)"
 
 
 def delete_file(path: str, workspace):
-    file_path = Path(workspace.root) / path
+    file_path = workspace.root_path / path
     if file_path.exists():
         file_path.unlink()
+        workspace.invalidate()
         return f"Deleted {path}"
     return f"{path} not found"
 
 
+@functools.lru_cache(maxsize=1)
+def _dest_var_args() -> Tuple[str, ...]:
+    """-var flags carrying destination credentials, read from the environment once."""
+    var_args: List[str] = []
+    if "DEST_AWS_ACCESS_KEY_ID" in os.environ:
+        var_args.extend(["-var", f"aws_access_key={os.environ['DEST_AWS_ACCESS_KEY_ID']}"])
+    if "DEST_AWS_SECRET_ACCESS_KEY" in os.environ:
+        var_args.extend(["-var", f"aws_secret_key={os.environ['DEST_AWS_SECRET_ACCESS_KEY']}"])
+    if "AWS_REGION" in os.environ:
+        var_args.extend(["-var", f"aws_region={os.environ['AWS_REGION']}"])
+    return tuple(var_args)
+
+
+def _tree_mtime(root: str) -> int:
+    """Newest mtime (ns) of any file or directory under root.
+
+    Directories are included so deletions and renames also bump the key.
+    """
+    latest = 0
+    for dirpath, _, filenames in os.walk(root):
+        latest = max(latest, os.stat(dirpath).st_mtime_ns)
+        for name in filenames:
+            try:
+                latest = max(latest, os.stat(os.path.join(dirpath, name)).st_mtime_ns)
+            except OSError:
+                pass
+    return latest
+
+
+# (argv, root, newest mtime under root) -> result; an LRU shared by the scheduler threads
+_run_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_run_cache_lock = threading.Lock()
+
+
+def _is_cacheable(parts: List[str]) -> bool:
+    """True if a "local" read's output is a function of the workspace files alone.
+
+    Backend-backed terraform reads and arguments pointing outside the
+    workspace (absolute, ~ or .. paths) are excluded.
+    """
+    if parts[0] == "terraform" and parts[1] in UNCACHED_TF_SUBCOMMANDS:
+        return False
+    for arg in parts[1:]:
+        # Options such as -chdir=/path carry the path after "="
+        value = arg.split("=", 1)[1] if arg.startswith("-") and "=" in arg else arg
+        if value.startswith(("/", "~")) or ".." in value.split("/"):
+            return False
+    return True
+
+
+def _clear_run_cache() -> None:
+    with _run_cache_lock:
+        _run_cache.clear()
+
+
+def _run_cached(cmd_parts: List[str], root: str) -> Dict[str, Any]:
+    """Run a command whose output depends only on the workspace, reusing the
+    result of an earlier identical run against an unchanged tree.
+
+    Only successful runs are stored; failures and exceptions (e.g. timeouts)
+    always re-run.
+    """
+    key = (tuple(cmd_parts), root, _tree_mtime(root))
+    with _run_cache_lock:
+        if key in _run_cache:
+            _run_cache.move_to_end(key)
+            return dict(_run_cache[key])
+    result = _execute(cmd_parts, root)
+    if result["returncode"] == 0:
+        with _run_cache_lock:
+            _run_cache[key] = dict(result)
+            if len(_run_cache) > RUN_CACHE_SIZE:
+                _run_cache.popitem(last=False)
+    return result
+
+
+def _drain(stream, tail: bytearray) -> None:
+    """Read a pipe to EOF, keeping only its last OUTPUT_TAIL_BYTES."""
+    for chunk in iter(lambda: stream.read1(65536), b""):
+        tail += chunk
+        if len(tail) > OUTPUT_TAIL_BYTES:
+            del tail[:-OUTPUT_TAIL_BYTES]
+    stream.close()
+
+
+def _execute(cmd_parts: List[str], root: str) -> Dict[str, Any]:
+    """Run a command, holding at most OUTPUT_TAIL_BYTES of each stream in memory.
+
+    On timeout the process is killed and TimeoutExpired carries the tails read so far.
+    """
+    deadline = time.monotonic() + COMMAND_TIMEOUT
+    proc = subprocess.Popen(cmd_parts, cwd=root, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    tails = (bytearray(), bytearray())
+    readers = [
+        threading.Thread(target=_drain, args=(stream, tail), daemon=True)
+        for stream, tail in zip((proc.stdout, proc.stderr), tails)
+    ]
+    for reader in readers:
+        reader.start()
+    timed_out = False
+    try:
+        proc.wait(timeout=COMMAND_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        timed_out = True
+    # Orphaned grandchildren may keep a pipe open; don't hang on them. Both
+    # readers share one deadline, never later than the command's own
+    drain_deadline = min(deadline, time.monotonic() + 5)
+    for reader in readers:
+        reader.join(timeout=max(drain_deadline - time.monotonic(), 0))
+    # Decode only the kept tail; "replace" covers a split character
+    stdout, stderr = (bytes(tail).decode("utf-8", errors="replace") for tail in tails)
+    if timed_out:
+        raise subprocess.TimeoutExpired(cmd_parts, COMMAND_TIMEOUT, output=stdout, stderr=stderr)
+    return {
+        "returncode": proc.returncode,
+        "stdout": stdout,
+        "stderr": stderr,
+    }
+
+
 def run_command(cmd: str, workspace):
-    import subprocess, shlex, os
     try:
         # Parse command safely
         cmd_parts = shlex.split(cmd)
         
         # If it's a terraform command that needs AWS credentials, add them
-        if len(cmd_parts) >= 2 and cmd_parts[0] == "terraform" and cmd_parts[1] in ["plan", "apply", "destroy", "refresh", "import"]:
-            # Insert credential variables after the terraform command
-            var_args = []
-            if "DEST_AWS_ACCESS_KEY_ID" in os.environ:
-                var_args.extend(["-var", f"aws_access_key={os.environ['DEST_AWS_ACCESS_KEY_ID']}"])
-            if "DEST_AWS_SECRET_ACCESS_KEY" in os.environ:
-                var_args.extend(["-var", f"aws_secret_key={os.environ['DEST_AWS_SECRET_ACCESS_KEY']}"])
-            if "AWS_REGION" in os.environ:
-                var_args.extend(["-var", f"aws_region={os.environ.get('AWS_REGION', 'us-east-1')}"])
-            
+        if len(cmd_parts) >= 2 and cmd_parts[0] == "terraform" and cmd_parts[1] in CREDENTIAL_TF_SUBCOMMANDS:
+            var_args = _dest_var_args()
             if var_args:
                 # Insert variables after the command (e.g., "terraform plan" -> "terraform plan -var ... -var ...")
-                cmd_parts = cmd_parts[:2] + var_args + cmd_parts[2:]
+                cmd_parts = cmd_parts[:2] + list(var_args) + cmd_parts[2:]
         
-        completed = subprocess.run(cmd_parts, cwd=workspace.root, capture_output=True, text=True, timeout=30)
-        return {
-            "returncode": completed.returncode,
-            "stdout": completed.stdout[-4000:] if completed.stdout else "",
-            "stderr": completed.stderr[-4000:] if completed.stderr else "",
-        }
-    except subprocess.TimeoutExpired:
+        kind = _read_only_kind(cmd_parts)
+        if kind == "local" and _is_cacheable(cmd_parts):
+            # Same workspace read against an unchanged tree: reuse the previous result
+            return _run_cached(cmd_parts, workspace.root)
+        if kind is None:
+            # May change files, backend or AWS state that neither the snapshot
+            # fingerprint nor the tree mtime sees
+            workspace.invalidate()
+            _clear_run_cache()
+        # AWS and backend reads depend on remote state and credentials, so they always run
+        return _execute(cmd_parts, workspace.root)
+    except subprocess.TimeoutExpired as e:
+        # Keep whatever the command printed before it was killed
         return {
             "returncode": -1,
-            "stdout": "",
-            "stderr": "Command timed out after 30 seconds"
+            "stdout": e.output or "",
+            "stderr": (e.stderr + "\n" if e.stderr else "") + f"Command timed out after {COMMAND_TIMEOUT} seconds",
         }
     except Exception as e:
         return {
@@ -167,25 +338,185 @@ The command runs with a 30-second timeout and returns stdout/stderr.""",
 }
 
 
-def apply_llm_actions(response, workspace, tool_map: Dict[str, Tool], logger: logging.Logger) -> bool:
-    """Execute function calls returned by the LLM response.
+def _aws_operation(parts: List[str]) -> Tuple[str, str]:
+    """(service, operation) of an `aws ...` argv, skipping global options."""
+    words: List[str] = []
+    i = 1
+    while i < len(parts) and len(words) < 2:
+        part = parts[i]
+        if part.startswith("--"):
+            # Options such as --region take the next word as their value
+            if "=" not in part and part not in AWS_FLAG_OPTIONS:
+                i += 1
+        else:
+            words.append(part)
+        i += 1
+    words += [""] * (2 - len(words))
+    return words[0], words[1]
+
+
+def _read_only_kind(parts: List[str]) -> Optional[str]:
+    """Classify a run_command argv against the read-only allowlist.
+
+    Returns "local" when the output depends only on the workspace, "remote"
+    for reads of AWS state, and None for anything that may write.
+    """
+    if not parts:
+        return None
+    if parts[0] in READ_ONLY_LOCAL_COMMANDS:
+        return "local"
+    if parts[0] == "terraform":
+        if len(parts) < 2 or parts[1] not in READ_ONLY_TF_SUBCOMMANDS:
+            return None
+        if parts[1] == "providers" and len(parts) > 2 and parts[2] in ("lock", "mirror"):
+            return None
+        return "local"
+    if parts[0] == "aws":
+        operation = _aws_operation(parts)
+        if operation in WRITING_AWS_OPERATIONS:
+            return None
+        if operation in READ_ONLY_AWS_OPERATIONS or operation[1].startswith(READ_ONLY_AWS_PREFIXES):
+            return "remote"
+    return None
+
+
+def _is_read_only(tool_name: str, args: Dict[str, Any]) -> bool:
+    """True if a tool call has no side effects and may overlap with others."""
+    if tool_name != "run_command":
+        return False
+    try:
+        parts = shlex.split(args.get("cmd", ""))
+    except ValueError:
+        return False
+    return _read_only_kind(parts) is not None
+
+
+def _signals_finished(content: str) -> bool:
+    """True if content starts with "finished", ignoring case and leading whitespace.
+
+    Only the leading prefix is inspected; the reasoning body is never copied.
+    """
+    i = 0
+    while i < len(content) and content[i].isspace():
+        i += 1
+    return content[i:i + 8].lower() == "finished"
+
+
+class _ToolScheduler:
+    """Dispatch tool calls as they arrive while preserving their effective order.
+
+    Read-only calls overlap with each other; any other call waits for every
+    call submitted before it, and every later call waits for it.
+    """
+
+    def __init__(self, workspace, logger: logging.Logger):
+        self.workspace = workspace
+        self.logger = logger
+        # Created on first submit: responses without tool calls never spawn threads
+        self.pool: Optional[ThreadPoolExecutor] = None
+        self.barrier: Optional[Future] = None
+        self.since_barrier: List[Future] = []
+        self.submitted: List[Tuple[str, Future]] = []
+
+    def submit(self, name: str, handler: Tool, args: Dict[str, Any]) -> None:
+        if self.pool is None:
+            # FIFO pool: a job only ever waits on earlier jobs, so it cannot deadlock
+            self.pool = ThreadPoolExecutor(max_workers=MAX_PARALLEL_TOOLS)
+        if _is_read_only(name, args):
+            deps = [self.barrier] if self.barrier else []
+            future = self.pool.submit(self._call, deps, handler, args)
+            self.since_barrier.append(future)
+        else:
+            deps = self.since_barrier + ([self.barrier] if self.barrier else [])
+            future = self.pool.submit(self._call, deps, handler, args)
+            self.barrier, self.since_barrier = future, []
+        self.submitted.append((name, future))
+
+    def _call(self, deps: List[Future], handler: Tool, args: Dict[str, Any]):
+        wait(deps)
+        return handler(**args, workspace=self.workspace)
+
+    def finish(self) -> None:
+        """Wait for all calls and log their results in call order."""
+        try:
+            for name, future in self.submitted:
+                self.logger.info("Tool %s returned: %s", name, future.result())
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+
 
+def apply_llm_actions(stream, workspace, tool_map: Dict[str, Tool], logger: logging.Logger) -> bool:
+    """Execute function calls from a streamed LLM response.
+
+    Each tool call is dispatched as soon as its arguments form complete JSON,
+    while the model is still emitting the rest of the response.
     Returns True if the model indicated the overall task is finished.
     """
-    # openai v1 response structure
-    for choice in response.choices:
-        msg = choice.message
-        if getattr(msg, "tool_calls", None):
-            for call in msg.tool_calls:
-                tool_name = call.function.name
-                handler = tool_map.get(tool_name)
-                if not handler:
-                    logger.warning("Tool %s not registered", tool_name)
-                    continue
-                args = json.loads(call.function.arguments)
-                result = handler(**args, workspace=workspace)
-                logger.info("Tool %s returned: %s", tool_name, result)
-        if msg.content and msg.content.strip().lower().startswith("finished"):
-            # model signals done
-            return True
-    return False 
\ No newline at end of file
+    content: List[str] = []
+    calls: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    order: List[Dict[str, Any]] = []
+    dispatched = 0
+    scheduler = _ToolScheduler(workspace, logger)
+
+    def dispatch(call: Dict[str, Any]) -> None:
+        handler = tool_map.get(call["name"])
+        if not handler:
+            logger.warning("Tool %s not registered", call["name"])
+        elif call["args"] is not None:
+            scheduler.submit(call["name"], handler, call["args"])
+        else:
+            logger.warning("Tool %s sent malformed arguments: %s", call["name"], call["arguments"])
+
+    try:
+        # openai v1 streaming structure
+        for chunk in stream:
+            for choice in chunk.choices:
+                delta = choice.delta
+                if delta.content:
+                    content.append(delta.content)
+                for tc in delta.tool_calls or ():
+                    key = (choice.index, tc.index)
+                    call = calls.get(key)
+                    if call is None:
+                        call = calls[key] = {"name": "", "arguments": "", "args": None}
+                        order.append(call)
+                    if tc.function and tc.function.name:
+                        call["name"] += tc.function.name
+                    if tc.function and tc.function.arguments:
+                        call["arguments"] += tc.function.arguments
+                        if call["arguments"].rstrip().endswith("}"):
+                            try:
+                                call["args"] = json_loads(call["arguments"])
+                            except ValueError:
+                                pass
+                # A call is complete once its JSON closes or a later call starts
+                while dispatched < len(order) and (
+                    order[dispatched]["args"] is not None or dispatched < len(order) - 1
+                ):
+                    dispatch(order[dispatched])
+                    dispatched += 1
+
+        for call in order[dispatched:]:
+            if call["args"] is None:
+                try:
+                    call["args"] = json_loads(call["arguments"] or "{}")
+                except ValueError:
+                    pass
+            dispatch(call)
+
+        text = "".join(content)
+        if logger.isEnabledFor(logging.DEBUG):
+            dumped = json.dumps({"content": text, "tool_calls": [(c["name"], c["arguments"]) for c in order]})
+            logger.debug("LLM response: %s", dumped[:1000] + ("..." if len(dumped) > 1000 else ""))
+        if text:
+            logger.info("Agent reasoning: %s", text[:500])
+        if order:
+            logger.info("Agent plans to use %d tools", len(order))
+            for call in order:
+                logger.info("  - %s", call["name"])
+    finally:
+        scheduler.finish()
+
+    # model signals done
+    return _signals_finished(text)
@@ -59,7 +59,9 @@ def main():
     infra_dir.mkdir(parents=True, exist_ok=True)
 
     # If infra dir is empty, run terraformer import to populate
-    if not any(infra_dir.iterdir()):
+    with os.scandir(infra_dir) as it:
+        empty = next(it, None) is None
+    if empty:
         LOGGER.info("Running terraformer import to discover resources from source account ...")
         rc = import_aws(str(infra_dir))
         if rc != 0:
@@ -4,7 +4,9 @@
 DEFAULT_MAX_ITERATIONS = 20
 DEFAULT_MODEL = "gpt-4"
 DEFAULT_MEMORY_ITEMS = 100
-DEFAULT_AGENT_SLEEP = 1  # seconds between iterations
+DEFAULT_PROMPT_WINDOW = 7  # observations sent to the LLM per step (incl. pinned first)
+DEFAULT_RATE_LIMIT_RETRIES = 5  # LLM retries on OpenAI RateLimitError
+DEFAULT_RATE_LIMIT_MAX_BACKOFF = 30  # seconds, cap for exponential backoff
 
 # Git configuration
 DEFAULT_BRANCH = "anchor/infra"
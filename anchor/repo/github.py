@@ -1,11 +1,22 @@
+import functools
 from typing import Optional
 
 from github import Github
 
 
+@functools.lru_cache(maxsize=8)
+def _client(token: str) -> Github:
+    return Github(token, per_page=100, retry=3)
+
+
+@functools.lru_cache(maxsize=64)
+def _repo(token: str, repo_full_name: str):
+    # lazy=True skips the metadata GET; create_pull only needs the repo URL
+    return _client(token).get_repo(repo_full_name, lazy=True)
+
+
 def open_pull_request(token: str, repo_full_name: str, branch: str, title: str, body: str) -> str:
     """Open a PR and return its URL."""
-    gh = Github(token)
-    repo = gh.get_repo(repo_full_name)
+    repo = _repo(token, repo_full_name)
     pr = repo.create_pull(title=title, body=body, head=branch, base="main")
-    return pr.html_url 
\ No newline at end of file
+    return pr.html_url
@@ -1,8 +1,35 @@
 import subprocess
+import hashlib
 import json
+from collections import deque
 from pathlib import Path
-from typing import Dict, Any
+from typing import Callable, Deque, Dict, Any, List, Optional, Tuple
 import os
+import threading
+
+from .parser import ijson, plan_stats, plan_stats_stream
+
+try:
+    # Decodes multi-MB plan JSON several times faster than the stdlib
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+# Subcommands that talk to AWS and need destination credentials
+CREDENTIAL_SUBCOMMANDS = frozenset(("plan", "apply", "destroy", "refresh", "import"))
+# Marker in .terraform/ holding the config signature of the last successful init
+INIT_SIGNATURE_FILE = "anchor_init_sig"
+# Characters of streamed output kept for the result of long-running commands
+STREAM_TAIL_CHARS = 64 * 1024
+# Bytes of plan stderr kept; the snapshot only reports the tail
+PLAN_STDERR_TAIL_BYTES = 2000
+
+
+def plugin_cache_dir() -> str:
+    """Host-wide provider plugin cache so each workspace's init reuses downloads."""
+    cache_dir = os.environ.get("TF_PLUGIN_CACHE_DIR") or str(Path.home() / ".terraform.d" / "plugin-cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
 
 
 class TerraformExecutor:
@@ -10,54 +37,205 @@ class TerraformExecutor:
 
     def __init__(self, working_dir: str):
         self.working_dir = working_dir
+        # Environment and credential flags are fixed for the executor's lifetime,
+        # so build them once instead of copying os.environ per command
+        self._env = os.environ.copy()
+        self._env["TF_PLUGIN_CACHE_DIR"] = plugin_cache_dir()
+        # Drops the interactive "next steps" hints from command output
+        self._env["TF_IN_AUTOMATION"] = "1"
+        self._var_args: List[str] = []
+        if "DEST_AWS_ACCESS_KEY_ID" in os.environ:
+            self._var_args.extend(["-var", f"aws_access_key={os.environ['DEST_AWS_ACCESS_KEY_ID']}"])
+        if "DEST_AWS_SECRET_ACCESS_KEY" in os.environ:
+            self._var_args.extend(["-var", f"aws_secret_key={os.environ['DEST_AWS_SECRET_ACCESS_KEY']}"])
+        if "AWS_REGION" in os.environ:
+            self._var_args.extend(["-var", f"aws_region={os.environ['AWS_REGION']}"])
+        # Also set AWS environment variables for provider authentication
+        self._aws_env = dict(self._env)
+        if "DEST_AWS_ACCESS_KEY_ID" in os.environ and "DEST_AWS_SECRET_ACCESS_KEY" in os.environ:
+            self._aws_env["AWS_ACCESS_KEY_ID"] = os.environ["DEST_AWS_ACCESS_KEY_ID"]
+            self._aws_env["AWS_SECRET_ACCESS_KEY"] = os.environ["DEST_AWS_SECRET_ACCESS_KEY"]
 
-    def _run(self, args: list[str]) -> Dict[str, Any]:
-        cmd = ["terraform", *args]
-        env = os.environ.copy()
-        
+    def _command(self, args: list[str]) -> Tuple[List[str], Dict[str, str]]:
+        """Build the terraform argv and environment for a subcommand."""
         # Only add credential variables for commands that actually use AWS
-        if args and args[0] in ["plan", "apply", "destroy", "refresh", "import"]:
-            # Add credential variables for these commands
-            var_args = []
-            if "DEST_AWS_ACCESS_KEY_ID" in os.environ:
-                var_args.extend(["-var", f"aws_access_key={os.environ['DEST_AWS_ACCESS_KEY_ID']}"])
-            if "DEST_AWS_SECRET_ACCESS_KEY" in os.environ:
-                var_args.extend(["-var", f"aws_secret_key={os.environ['DEST_AWS_SECRET_ACCESS_KEY']}"])
-            if "AWS_REGION" in os.environ:
-                var_args.extend(["-var", f"aws_region={os.environ.get('AWS_REGION', 'us-east-1')}"])
-            
+        if args and args[0] in CREDENTIAL_SUBCOMMANDS:
             # Insert var args after the command but before any other args
-            if var_args:
-                cmd = ["terraform", args[0]] + var_args + args[1:]
-            
-            # Also set AWS environment variables for provider authentication
-            env["AWS_ACCESS_KEY_ID"] = os.environ["DEST_AWS_ACCESS_KEY_ID"]
-            env["AWS_SECRET_ACCESS_KEY"] = os.environ["DEST_AWS_SECRET_ACCESS_KEY"]
-        
-        proc = subprocess.run(cmd, cwd=self.working_dir, capture_output=True, text=True, env=env)
+            return ["terraform", args[0], *self._var_args, *args[1:]], self._aws_env
+        return ["terraform", *args], self._env
+
+    def _run(self, args: list[str], stderr_tail: Optional[int] = None, keep_stdout: bool = True) -> Dict[str, Any]:
+        """Run a subcommand.
+
+        With stderr_tail, only that many trailing bytes of stderr are held and
+        decoded; with keep_stdout=False, stdout goes to /dev/null.
+        """
+        cmd, env = self._command(args)
+        if stderr_tail is None and keep_stdout:
+            proc = subprocess.run(cmd, cwd=self.working_dir, capture_output=True, text=True, env=env)
+            return {
+                "returncode": proc.returncode,
+                "stdout": proc.stdout,
+                "stderr": proc.stderr,
+            }
+        proc = subprocess.Popen(
+            cmd, cwd=self.working_dir, env=env,
+            stdout=subprocess.PIPE if keep_stdout else subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+        tail = bytearray()
+
+        def drain() -> None:
+            for chunk in iter(lambda: proc.stderr.read1(65536), b""):
+                tail.extend(chunk)
+                if stderr_tail is not None and len(tail) > stderr_tail:
+                    del tail[:-stderr_tail]
+
+        stdout = b""
+        if keep_stdout:
+            reader = threading.Thread(target=drain, daemon=True)
+            reader.start()
+            stdout = proc.stdout.read()
+            reader.join()
+            proc.stdout.close()
+        else:
+            drain()
+        proc.wait()
+        proc.stderr.close()
+        # Drop a UTF-8 sequence cut in half by the trim
+        start = 0
+        while start < len(tail) and tail[start] & 0xC0 == 0x80:
+            start += 1
+        return {
+            "returncode": proc.returncode,
+            "stdout": stdout.decode("utf-8", errors="replace"),
+            "stderr": tail[start:].decode("utf-8", errors="replace"),
+        }
+
+    def _run_streaming(self, args: list[str], on_line: Callable[[str], None] = print) -> Dict[str, Any]:
+        """Run a command, passing each output line to on_line as it arrives.
+
+        stderr is merged into stdout, and only the last STREAM_TAIL_CHARS of it
+        are kept for the returned "stdout".
+        """
+        cmd, env = self._command(args)
+        tail: Deque[str] = deque()
+        size = 0
+        with subprocess.Popen(
+            cmd, cwd=self.working_dir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            bufsize=1, text=True, errors="replace", env=env,
+        ) as proc:
+            for line in proc.stdout:
+                on_line(line.rstrip("\n"))
+                tail.append(line)
+                size += len(line)
+                while size > STREAM_TAIL_CHARS and len(tail) > 1:
+                    size -= len(tail.popleft())
         return {
             "returncode": proc.returncode,
-            "stdout": proc.stdout,
-            "stderr": proc.stderr,
+            "stdout": "".join(tail),
+            "stderr": "",
+        }
+
+    def _show_json(self, plan_file: str, stats_only: bool = False) -> Dict[str, Any]:
+        """Run `terraform show -json`, parsing stdout straight from the pipe.
+
+        Full output is read into a single growing buffer that the parser consumes
+        in place, so the plan is never held as both bytes and str. With
+        stats_only the pipe feeds a streaming counter and no tree is built.
+        """
+        cmd, env = self._command(["show", "-json", plan_file])
+        proc = subprocess.Popen(cmd, cwd=self.working_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+        # Drain stderr concurrently so a chatty stderr cannot block stdout
+        stderr_chunks: List[bytes] = []
+        drain = threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)
+        drain.start()
+        parsed: Any = None
+        try:
+            if stats_only:
+                parsed = plan_stats_stream(proc.stdout)
+            else:
+                buf = bytearray()
+                for chunk in iter(lambda: proc.stdout.read1(65536), b""):
+                    buf += chunk
+                parsed = buf
+        except ValueError:
+            # Truncated or invalid JSON; the return code below tells the story
+            parsed = None
+        finally:
+            proc.stdout.close()
+            drain.join()
+            proc.wait()
+        result: Dict[str, Any] = {
+            "returncode": proc.returncode,
+            "stdout": "",
+            "stderr": b"".join(stderr_chunks).decode("utf-8", errors="replace"),
         }
+        if proc.returncode == 0 and parsed is not None:
+            if stats_only:
+                result["stats"] = parsed
+            else:
+                result["json"] = json_loads(parsed)
+        return result
 
     def fmt(self) -> Dict[str, Any]:
         return self._run(["fmt", "-recursive", "-check"])
 
+    def _init_signature(self) -> str:
+        """Digest of every .tf file (outside .terraform/) plus the lock file."""
+        sig = hashlib.blake2b(digest_size=16)
+        root = Path(self.working_dir)
+        for path in sorted(root.rglob("*.tf")):
+            rel = path.relative_to(root)
+            if rel.parts[0] == ".terraform":
+                continue
+            sig.update(str(rel).encode())
+            sig.update(path.read_bytes())
+        lock = root / ".terraform.lock.hcl"
+        sig.update(lock.read_bytes() if lock.exists() else b"")
+        return sig.hexdigest()
+
     def init(self) -> Dict[str, Any]:
-        return self._run(["init", "-input=false", "-upgrade"])
+        # Skip the registry round-trips when nothing init depends on has changed
+        # since the last successful init. The marker lives in .terraform/, so
+        # removing that directory forces a fresh init.
+        marker = Path(self.working_dir) / ".terraform" / INIT_SIGNATURE_FILE
+        try:
+            if marker.read_text() == self._init_signature():
+                return {"returncode": 0, "stdout": "Configuration unchanged since last init; skipped.", "stderr": ""}
+        except OSError:
+            pass
+        result = self._run(["init", "-input=false", "-upgrade"])
+        if result["returncode"] == 0 and marker.parent.is_dir():
+            # Computed after init, which may have rewritten the lock file
+            marker.write_text(self._init_signature())
+        return result
 
     def validate(self) -> Dict[str, Any]:
         return self._run(["validate", "-no-color"])
 
-    def plan(self, out_file: str = "tfplan") -> Dict[str, Any]:
-        return self._run(["plan", "-input=false", "-no-color", f"-out={out_file}"])
+    def plan(self, out_file: str = "tfplan", keep_stdout: bool = True) -> Dict[str, Any]:
+        # keep_stdout=False drops the rendered diff for callers that read the plan file instead
+        return self._run(
+            ["plan", "-input=false", "-no-color", f"-out={out_file}"],
+            stderr_tail=PLAN_STDERR_TAIL_BYTES,
+            keep_stdout=keep_stdout,
+        )
 
-    def show_plan_json(self, plan_file: str = "tfplan") -> Dict[str, Any]:
-        result = self._run(["show", "-json", plan_file])
-        if result["returncode"] == 0:
-            result["json"] = json.loads(result["stdout"])
-        return result
+    def show_plan_json(self, plan_file: str = "tfplan", stats_only: bool = False) -> Dict[str, Any]:
+        """Return `terraform show -json` output parsed under "json".
+
+        With stats_only, return only plan_stats counts under "stats", streamed
+        from the pipe without parsing the full tree (needs ijson).
+        """
+        if stats_only and ijson is None:
+            result = self.show_plan_json(plan_file)
+            if "json" in result:
+                result["stats"] = plan_stats(result.pop("json"))
+            return result
+
+        return self._show_json(plan_file, stats_only)
 
-    def apply(self, plan_file: str = "tfplan") -> Dict[str, Any]:
-        return self._run(["apply", "-input=false", plan_file]) 
\ No newline at end of file
+    def apply(self, plan_file: str = "tfplan", on_line: Callable[[str], None] = print) -> Dict[str, Any]:
+        # Applies can run for a long time and print a lot; stream progress
+        # instead of buffering all of it
+        return self._run_streaming(["apply", "-input=false", plan_file], on_line) 
\ No newline at end of file
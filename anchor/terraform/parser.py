@@ -1,4 +1,9 @@
-from typing import Dict, Any
+from typing import Dict, Any, BinaryIO
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 
 def plan_stats(plan_json: Dict[str, Any]) -> Dict[str, int]:
@@ -14,4 +19,22 @@ def plan_stats(plan_json: Dict[str, Any]) -> Dict[str, int]:
             changes += 1
         if "delete" in action:
             destroys += 1
-    return {"create": adds, "update": changes, "delete": destroys} 
\ No newline at end of file
+    return {"create": adds, "update": changes, "delete": destroys} 
+
+def plan_stats_stream(fp: BinaryIO) -> Dict[str, int]:
+    """Same counts as plan_stats, read incrementally from a plan JSON byte stream.
+
+    Only the action strings are looked at, so memory stays flat however large
+    the plan is. Requires ijson; raises ValueError on malformed input.
+    """
+    seen = False
+    counts = {"create": 0, "update": 0, "delete": 0}
+    try:
+        for prefix, event, value in ijson.parse(fp):
+            if prefix == "resource_changes" and event == "start_array":
+                seen = True
+            elif prefix == "resource_changes.item.change.actions.item" and value in counts:
+                counts[value] += 1
+    except ijson.JSONError as e:
+        raise ValueError(f"Invalid plan JSON: {e}") from e
+    return counts if seen else {}
@@ -4,20 +4,67 @@ Following Anthropic's best practices: use simple, deterministic workflows
 before resorting to autonomous agents.
 """
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import re
 
 LOGGER = logging.getLogger("anchor.terraform.precheck")
 
+# Compiled once; these run against every scanned file
+_MODULE_RE = re.compile(r'module\s+"([^"]+)"\s*\{\s*source\s*=\s*"([^"]+)"')
+_PROVIDER_AWS_RE = re.compile(r'provider\s+"aws"')
+# File scans are I/O bound, so oversubscribe the CPUs
+_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
 
-def check_module_structure(terraform_dir: Path) -> List[Dict[str, str]]:
-    """Check for common module structure issues."""
+
+def _scan_tree(terraform_dir: Path) -> Dict[str, Any]:
+    """Walk terraform_dir once with os.scandir and bucket what the checks need.
+
+    Returns root-level entry names, all provider.tf paths (in rglob-like
+    order) and the set of directories relative to terraform_dir. Symlinked
+    and unreadable directories are not descended into. The
+    .terraform/ working directory is skipped: it is not user configuration and
+    may be written by a concurrent `terraform init`.
+    """
+    tree: Dict[str, Any] = {"root_entries": set(), "provider_tf": [], "dirs": set()}
+
+    def walk(path: str, rel: str) -> None:
+        subdirs = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if rel == "":
+                        tree["root_entries"].add(entry.name)
+                    # Like rglob, do not follow symlinked directories (no cycles)
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name != ".terraform":
+                            subdirs.append(entry)
+                    elif entry.name == "provider.tf":
+                        tree["provider_tf"].append(Path(entry.path))
+        except OSError:
+            # Unreadable directory: skip it, as rglob does
+            return
+        for entry in subdirs:
+            sub_rel = f"{rel}/{entry.name}" if rel else entry.name
+            tree["dirs"].add(sub_rel)
+            walk(entry.path, sub_rel)
+
+    walk(str(terraform_dir), "")
+    return tree
+
+
+def check_module_structure(terraform_dir: Path, tree: Optional[Dict[str, Any]] = None) -> List[Dict[str, str]]:
+    """Check for common module structure issues.
+
+    tree is an optional _scan_tree result that saves the per-path stat calls.
+    """
     issues = []
     
     # Check if main.tf exists
     main_tf = terraform_dir / "main.tf"
-    if not main_tf.exists():
+    if not ("main.tf" in tree["root_entries"] if tree else main_tf.exists()):
         issues.append({
             "file": "main.tf",
             "issue": "Missing main.tf file",
@@ -27,14 +74,12 @@ def check_module_structure(terraform_dir: Path) -> List[Dict[str, str]]:
     
     # Check if modules are referenced
     main_content = main_tf.read_text()
-    module_pattern = r'module\s+"([^"]+)"\s*{\s*source\s*=\s*"([^"]+)"'
-    modules = re.findall(module_pattern, main_content)
-    
-    for module_name, module_source in modules:
+    for match in _MODULE_RE.finditer(main_content):
+        module_name, module_source = match.groups()
         # Check if module directory exists
         if module_source.startswith("./"):
             module_path = terraform_dir / module_source[2:]
-            if not module_path.exists():
+            if not ((tree and module_source[2:].rstrip("/") in tree["dirs"]) or module_path.exists()):
                 issues.append({
                     "file": "main.tf",
                     "issue": f"Module '{module_name}' references non-existent path: {module_source}",
@@ -44,8 +89,8 @@ def check_module_structure(terraform_dir: Path) -> List[Dict[str, str]]:
     return issues
 
 
-def check_required_files(terraform_dir: Path) -> List[Dict[str, str]]:
-    """Check for required Terraform files."""
+def check_required_files(terraform_dir: Path, tree: Optional[Dict[str, Any]] = None) -> List[Dict[str, str]]:
+    """Check for required Terraform files (tree: optional _scan_tree result)."""
     issues = []
     required_files = {
         "variables.tf": "Variable definitions for AWS credentials",
@@ -55,7 +100,7 @@ def check_required_files(terraform_dir: Path) -> List[Dict[str, str]]:
     
     for filename, description in required_files.items():
         filepath = terraform_dir / filename
-        if not filepath.exists():
+        if not (filename in tree["root_entries"] if tree else filepath.exists()):
             issues.append({
                 "file": filename,
                 "issue": f"Missing {filename} ({description})",
@@ -65,32 +110,46 @@ def check_required_files(terraform_dir: Path) -> List[Dict[str, str]]:
     return issues
 
 
-def check_provider_issues(terraform_dir: Path) -> List[Dict[str, str]]:
-    """Check for common provider configuration issues."""
+def _check_provider_file(provider_file: Path, terraform_dir: Path) -> List[Dict[str, str]]:
+    """Check a single provider.tf for hardcoded credentials and duplicate blocks."""
+    issues = []
+    raw = provider_file.read_bytes()
+    # Cheap byte-level prefilter: neither check can fire without these substrings
+    if b"access_key" not in raw and raw.count(b'"aws"') < 2:
+        return issues
+    content = raw.decode()
+    
+    # Check for hardcoded credentials
+    if "access_key" in content and "=" in content and "var." not in content:
+        issues.append({
+            "file": str(provider_file.relative_to(terraform_dir)),
+            "issue": "Possible hardcoded AWS credentials",
+            "fix": "Use variables instead: access_key = var.aws_access_key"
+        })
+    
+    # Check for duplicate provider blocks
+    provider_count = sum(1 for _ in _PROVIDER_AWS_RE.finditer(content))
+    if provider_count > 1:
+        issues.append({
+            "file": str(provider_file.relative_to(terraform_dir)),
+            "issue": f"Multiple provider blocks ({provider_count}) in same file",
+            "fix": "Keep only one provider block per file"
+        })
+    
+    return issues
+
+
+def check_provider_issues(terraform_dir: Path, tree: Optional[Dict[str, Any]] = None) -> List[Dict[str, str]]:
+    """Check for common provider configuration issues (tree: optional _scan_tree result)."""
     issues = []
     
     # Find all provider.tf files
-    provider_files = list(terraform_dir.rglob("provider.tf"))
+    provider_files = tree["provider_tf"] if tree else list(terraform_dir.rglob("provider.tf"))
     
-    for provider_file in provider_files:
-        content = provider_file.read_text()
-        
-        # Check for hardcoded credentials
-        if "access_key" in content and "=" in content and "var." not in content:
-            issues.append({
-                "file": str(provider_file.relative_to(terraform_dir)),
-                "issue": "Possible hardcoded AWS credentials",
-                "fix": "Use variables instead: access_key = var.aws_access_key"
-            })
-        
-        # Check for duplicate provider blocks
-        provider_count = content.count('provider "aws"')
-        if provider_count > 1:
-            issues.append({
-                "file": str(provider_file.relative_to(terraform_dir)),
-                "issue": f"Multiple provider blocks ({provider_count}) in same file",
-                "fix": "Keep only one provider block per file"
-            })
+    # Files are read concurrently; results keep the rglob order
+    with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as pool:
+        for file_issues in pool.map(lambda f: _check_provider_file(f, terraform_dir), provider_files):
+            issues.extend(file_issues)
     
     return issues
 
@@ -102,10 +161,11 @@ def run_prechecks(terraform_dir: str) -> Tuple[bool, List[Dict[str, str]]]:
     
     LOGGER.info("Running Terraform pre-checks...")
     
-    # Run all checks
-    all_issues.extend(check_required_files(terraform_path))
-    all_issues.extend(check_module_structure(terraform_path))
-    all_issues.extend(check_provider_issues(terraform_path))
+    # Run all checks off a single directory walk
+    tree = _scan_tree(terraform_path)
+    all_issues.extend(check_required_files(terraform_path, tree))
+    all_issues.extend(check_module_structure(terraform_path, tree))
+    all_issues.extend(check_provider_issues(terraform_path, tree))
     
     if all_issues:
         LOGGER.warning(f"Found {len(all_issues)} issues during pre-check")
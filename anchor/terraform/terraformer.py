@@ -1,11 +1,148 @@
+import asyncio
 import os
 import subprocess
 import shutil
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Dict, Set
+from typing import List, Optional, Dict, Set, Tuple
 from ..constants import TERRAFORMER_AWS_SERVICES
 
+# Static command prefix and file templates, built once at import
+_SERVICES_ARG = ",".join(TERRAFORMER_AWS_SERVICES)
+_TERRAFORMER_CMD = (
+    "terraformer",
+    "import",
+    "aws",
+    "--profile=",  # Force using environment variables
+    f"--resources={_SERVICES_ARG}",
+)
+
+_VARIABLES_TF = '''# IMPORTANT: DO NOT MODIFY THIS FILE - Required for AWS provider configuration
+# These variables are used by the root provider and all modules
+
+variable "aws_access_key" {
+  description = "AWS access key"
+  type        = string
+}
+
+variable "aws_secret_key" {
+  description = "AWS secret key"
+  type        = string
+}
+
+variable "aws_region" {
+  description = "AWS region"
+  type        = string
+  default     = "us-east-1"
+}'''
+
+_PROVIDER_TF = '''provider "aws" {
+  access_key = var.aws_access_key
+  secret_key = var.aws_secret_key
+  region     = var.aws_region
+}'''
+
+_BACKEND_TF = '''terraform {
+  backend "local" {}
+}'''
+
+# Protective header comment for the generated main.tf
+_MAIN_TF_HEADER = '''# IMPORTANT: DO NOT MODIFY THIS FILE - Auto-generated module definitions
+# If you see "Module not installed" errors, run: terraform init
+# Each module below references Terraform configurations imported by Terraformer
+
+'''
+
+_README_MD = '''# Terraform Configuration - Generated by Terraformer
+
+## Important Files (DO NOT MODIFY)
+- `main.tf` - Module definitions for all imported resources
+- `variables.tf` - Required AWS credential variables
+- `provider.tf` - Root AWS provider configuration
+- `backend.tf` - Terraform state backend configuration
+
+## Directory Structure
+Each service has its own directory with region subdirectories:
+- `service_name/region_name/` - Contains resources.tf, provider.tf, outputs.tf
+
+## Common Issues and Solutions
+
+### "Module not installed"
+**Solution**: Run `terraform init`
+
+### "Provider configuration not present"
+**Solution**: Ensure each module directory has its own provider.tf
+
+### "Missing required argument"
+**Solution**: Check that variables are defined in root variables.tf
+
+## To Deploy
+1. Run `terraform init` to initialize modules
+2. Run `terraform validate` to check syntax
+3. Run `terraform plan` to preview changes
+4. Run `terraform apply` to deploy
+
+## AWS Credentials
+The configuration uses variables for AWS credentials:
+- Set TF_VAR_aws_access_key
+- Set TF_VAR_aws_secret_key
+- Set TF_VAR_aws_region (defaults to us-east-1)
+'''
+
+# Self-contained provider.tf written into every module directory
+_MODULE_PROVIDER_TF = '''terraform {
+  required_providers {
+    aws = {
+      source  = "hashicorp/aws"
+      version = "~> 5.0"
+    }
+  }
+}
+
+provider "aws" {
+  access_key = var.aws_access_key
+  secret_key = var.aws_secret_key
+  region     = var.aws_region
+}
+
+variable "aws_access_key" {
+  description = "AWS access key"
+  type        = string
+}
+
+variable "aws_secret_key" {
+  description = "AWS secret key"
+  type        = string
+}
+
+variable "aws_region" {
+  description = "AWS region"
+  type        = string
+}
+'''
+
+
+async def _init_and_precheck(output_dir: str) -> Tuple[int, str, Tuple[bool, List[Dict[str, str]]]]:
+    """Run `terraform init -backend=false` concurrently with run_prechecks.
+
+    Returns (init returncode, init stderr, precheck result).
+    """
+    from .executor import plugin_cache_dir
+    from .precheck import run_prechecks
+    proc = await asyncio.create_subprocess_exec(
+        "terraform", "init", "-backend=false",
+        cwd=output_dir,
+        env={**os.environ, "TF_PLUGIN_CACHE_DIR": plugin_cache_dir()},
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    (_, stderr), precheck = await asyncio.gather(
+        proc.communicate(),
+        asyncio.to_thread(run_prechecks, output_dir),
+    )
+    return proc.returncode, stderr.decode("utf-8", errors="replace"), precheck
+
 
 def import_aws(output_dir: str, regions: Optional[List[str]] = None) -> int:
     """Run terraformer import aws for given regions.
@@ -15,22 +152,15 @@ def import_aws(output_dir: str, regions: Optional[List[str]] = None) -> int:
     regions = regions or [os.getenv("AWS_REGION", "us-east-1")]
     region_arg = ",".join(regions)
 
-    # Use services from constants
-    services = ",".join(TERRAFORMER_AWS_SERVICES)
-
     # Ensure output directory exists
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
 
     # Build command
-    print(f"[Terraformer] output_dir={output_dir} regions={region_arg} services={services}")
+    print(f"[Terraformer] output_dir={output_dir} regions={region_arg} services={_SERVICES_ARG}")
     
     cmd = [
-        "terraformer",
-        "import",
-        "aws",
-        "--profile=",  # Force using environment variables
-        f"--resources={services}",
+        *_TERRAFORMER_CMD,
         f"--regions={region_arg}",
         f"--path-output={output_dir}",
         "--compact",
@@ -63,15 +193,17 @@ def import_aws(output_dir: str, regions: Optional[List[str]] = None) -> int:
     # Move files from aws directory to output directory
     aws_dir = Path(output_dir) / "aws"
     if aws_dir.exists():
-        for item in aws_dir.glob("**/*"):
-            if item.is_file():
-                rel_path = item.relative_to(aws_dir)
-                # Ensure no trailing spaces in directory names
-                parts = list(rel_path.parts)
-                parts = [p.strip() for p in parts]
-                target_path = output_path.joinpath(*parts)
-                target_path.parent.mkdir(parents=True, exist_ok=True)
-                item.rename(target_path)
+        made: Set[str] = set()
+        for root, _, files in os.walk(aws_dir):
+            rel = os.path.relpath(root, aws_dir)
+            # Ensure no trailing spaces in directory names
+            parts = [] if rel == os.curdir else [p.strip() for p in rel.split(os.sep)]
+            target_parent = os.path.join(output_dir, *parts)
+            if files and target_parent not in made:
+                os.makedirs(target_parent, exist_ok=True)
+                made.add(target_parent)
+            for name in files:
+                os.rename(os.path.join(root, name), os.path.join(target_parent, name.strip()))
         # Remove aws directory and all its contents
         shutil.rmtree(aws_dir)
 
@@ -105,97 +237,46 @@ def import_aws(output_dir: str, regions: Optional[List[str]] = None) -> int:
         # Return early if no modules to avoid creating invalid configuration
         return 1
     
-    # Create configuration files in correct order
-    # 1. First create variables.tf (required by other files)
-    variables_config = '''# IMPORTANT: DO NOT MODIFY THIS FILE - Required for AWS provider configuration
-# These variables are used by the root provider and all modules
-
-variable "aws_access_key" {
-  description = "AWS access key"
-  type        = string
-}
-
-variable "aws_secret_key" {
-  description = "AWS secret key"
-  type        = string
-}
-
-variable "aws_region" {
-  description = "AWS region"
-  type        = string
-  default     = "us-east-1"
-}'''
-    variables_path = output_path / "variables.tf"
-    print(f"[Terraformer] Creating variables.tf at: {variables_path}")
-    try:
-        with variables_path.open("w") as f:
-            f.write(variables_config)
-        print(f"[Terraformer] Created variables.tf successfully")
-    except Exception as e:
-        print(f"[Terraformer] ERROR creating variables.tf: {e}")
-        return 1
-    
-    # 2. Create provider.tf
-    provider_config = '''provider "aws" {
-  access_key = var.aws_access_key
-  secret_key = var.aws_secret_key
-  region     = var.aws_region
-}'''
-    provider_path = output_path / "provider.tf"
-    print(f"[Terraformer] Creating provider.tf at: {provider_path}")
-    try:
-        with provider_path.open("w") as f:
-            f.write(provider_config)
-        print(f"[Terraformer] Created provider.tf successfully")
-    except Exception as e:
-        print(f"[Terraformer] ERROR creating provider.tf: {e}")
-        return 1
-    
-    # 3. Create backend.tf
-    backend_config = '''terraform {
-  backend "local" {}
-}'''
-    backend_path = output_path / "backend.tf"
-    print(f"[Terraformer] Creating backend.tf at: {backend_path}")
+    # 1-5. Root configuration files and the README for the agent. The files
+    # are independent, so write them concurrently
+    root_files = {
+        "variables.tf": _VARIABLES_TF,
+        "provider.tf": _PROVIDER_TF,
+        "backend.tf": _BACKEND_TF,
+        "main.tf": _MAIN_TF_HEADER + "\n".join(module_blocks),
+        "README.md": _README_MD,
+    }
+    for filename in root_files:
+        print(f"[Terraformer] Creating {filename} at: {output_path / filename}")
+    with ThreadPoolExecutor(max_workers=len(root_files)) as pool:
+        writes = {
+            filename: pool.submit(_fast_write, output_path / filename, content)
+            for filename, content in root_files.items()
+        }
     try:
-        with backend_path.open("w") as f:
-            f.write(backend_config)
-        print(f"[Terraformer] Created backend.tf successfully")
+        for filename in ("variables.tf", "provider.tf", "backend.tf", "main.tf"):
+            writes[filename].result()
     except Exception as e:
-        print(f"[Terraformer] ERROR creating backend.tf: {e}")
+        print(f"[Terraformer] ERROR creating {filename}: {e}")
         return 1
-    
-    # 4. Finally create main.tf (depends on variables)
-    main_tf_path = output_path / "main.tf"
-    print(f"[Terraformer] Creating main.tf at: {main_tf_path}")
+    print(f"[Terraformer] Created root configuration with {len(module_blocks)} modules")
+    # The README is informational only, so failing to write it is not fatal
     try:
-        with main_tf_path.open("w") as f:
-            # Add protective header comment
-            header = '''# IMPORTANT: DO NOT MODIFY THIS FILE - Auto-generated module definitions
-# If you see "Module not installed" errors, run: terraform init
-# Each module below references Terraform configurations imported by Terraformer
-
-'''
-            f.write(header + "\n".join(module_blocks))
-        print(f"[Terraformer] Created main.tf with {len(module_blocks)} modules")
+        writes["README.md"].result()
+        print(f"[Terraformer] Created README.md with instructions")
     except Exception as e:
-        print(f"[Terraformer] ERROR creating main.tf: {e}")
-        return 1
+        print(f"[Terraformer] ERROR creating README.md: {e}")
     
-    # 5. Initialize Terraform with local state
+    # 6. Initialize Terraform with local state; the read-only pre-checks of the
+    # generated configuration run while init downloads providers
     print("[Terraformer] Initializing Terraform...")
-    init_result = subprocess.run(
-        ["terraform", "init", "-backend=false"], 
-        cwd=output_dir,
-        capture_output=True,
-        text=True
-    )
-    if init_result.returncode != 0:
-        print(f"[Terraformer] ERROR during terraform init: {init_result.stderr}")
-        return init_result.returncode
+    init_returncode, init_stderr, (success, issues) = asyncio.run(_init_and_precheck(output_dir))
+    if init_returncode != 0:
+        print(f"[Terraformer] ERROR during terraform init: {init_stderr}")
+        return init_returncode
     print("[Terraformer] Terraform initialized successfully")
     
-    # 6. Validate all files were created
+    # 7. Validate all files were created
     required_files = ["variables.tf", "provider.tf", "backend.tf", "main.tf"]
     for filename in required_files:
         filepath = output_path / filename
@@ -207,9 +288,7 @@ variable "aws_region" {
     
     print(f"[Terraformer] Successfully completed import with {len(module_blocks)} modules")
     
-    # Run pre-checks to validate the generated configuration
-    from .precheck import run_prechecks
-    success, issues = run_prechecks(output_dir)
+    # Report pre-checks of the generated configuration
     if not success:
         print(f"[Terraformer] Pre-check found {len(issues)} potential issues:")
         for issue in issues[:5]:  # Show first 5 issues
@@ -217,52 +296,149 @@ variable "aws_region" {
         if len(issues) > 5:
             print(f"  ... and {len(issues) - 5} more issues")
     
-    # 7. Create README for the agent
-    readme_content = '''# Terraform Configuration - Generated by Terraformer
+    return 0 
 
-## Important Files (DO NOT MODIFY)
-- `main.tf` - Module definitions for all imported resources
-- `variables.tf` - Required AWS credential variables
-- `provider.tf` - Root AWS provider configuration
-- `backend.tf` - Terraform state backend configuration
+# Cleanup rewrites for Terraformer output, fused into one alternation so each
+# file is scanned once. Named groups pick the replacement in _fused_replacement.
+_FUSED_RE = re.compile(
+    "|".join((
+        # 1. Hardcoded AWS account IDs in ARNs
+        r'(?P<arn>arn:aws:(?P<arn_service>[^:]+):(?P<arn_region>[^:]+):\d{12}:)',
+        # 2. Hardcoded regions
+        r'(?P<region>(?P<region_key>region\s*=\s*)"[a-z]{2}-[a-z]+-\d+")',
+        # 3. Aliased provider references in resources
+        r'(?P<provider>provider\s*=\s*"aws\.[^"]*")',
+    )),
+)
+_PREVENT_DESTROY_RE = re.compile(r'prevent_destroy\s*=\s*true')
+_VAR_RE = re.compile(r'var\.(\w+)')
+# (directory, path, mtime_ns, size) of an already-cleaned file -> the var.
+# names it references, so re-runs skip the read and rewrite passes
+_CLEAN_CACHE: Dict[Tuple[str, str, int, int], frozenset] = {}
 
-## Directory Structure
-Each service has its own directory with region subdirectories:
-- `service_name/region_name/` - Contains resources.tf, provider.tf, outputs.tf
 
-## Common Issues and Solutions
+def _fused_replacement(match: re.Match) -> str:
+    kind = match.lastgroup
+    if kind == "arn":
+        return f"arn:aws:{match['arn_service']}:{match['arn_region']}:${{data.aws_caller_identity.current.account_id}}:"
+    if kind == "region":
+        return f"{match['region_key']}var.aws_region"
+    return "provider = aws"
 
-### "Module not installed"
-**Solution**: Run `terraform init`
 
-### "Provider configuration not present"
-**Solution**: Ensure each module directory has its own provider.tf
+def _strip_lifecycle_prevent_destroy(content: str) -> str:
+    """Splice out lifecycle blocks that set prevent_destroy = true.
 
-### "Missing required argument"
-**Solution**: Check that variables are defined in root variables.tf
+    The closing brace is found with a depth counter, so blocks nested inside
+    lifecycle are handled and the scan is linear with no regex backtracking.
+    """
+    pieces = []
+    pos = 0
+    size = len(content)
+    start = content.find("lifecycle")
+    while start != -1:
+        brace = start + len("lifecycle")
+        while brace < size and content[brace].isspace():
+            brace += 1
+        before = content[start - 1] if start else " "
+        if brace < size and content[brace] == "{" and not (before.isalnum() or before == "_"):
+            depth = 0
+            for end in range(brace, size):
+                char = content[end]
+                if char == "{":
+                    depth += 1
+                elif char == "}":
+                    depth -= 1
+                    if depth == 0:
+                        break
+            if depth == 0:
+                if _PREVENT_DESTROY_RE.search(content, brace, end):
+                    pieces.append(content[pos:start])
+                    pos = end + 1
+                start = content.find("lifecycle", end + 1)
+                continue
+        start = content.find("lifecycle", start + 1)
+    if not pieces:
+        return content
+    pieces.append(content[pos:])
+    return "".join(pieces)
 
-## To Deploy
-1. Run `terraform init` to initialize modules
-2. Run `terraform validate` to check syntax
-3. Run `terraform plan` to preview changes
-4. Run `terraform apply` to deploy
 
-## AWS Credentials
-The configuration uses variables for AWS credentials:
-- Set TF_VAR_aws_access_key
-- Set TF_VAR_aws_secret_key
-- Set TF_VAR_aws_region (defaults to us-east-1)
-'''
-    readme_path = output_path / "README.md"
-    print(f"[Terraformer] Creating README.md at: {readme_path}")
+def _fast_read(path: Path) -> str:
+    """Read a whole file with one sized os.read, skipping buffered text IO."""
+    fd = os.open(path, os.O_RDONLY)
     try:
-        with readme_path.open("w") as f:
-            f.write(readme_content)
-        print(f"[Terraformer] Created README.md with instructions")
-    except Exception as e:
-        print(f"[Terraformer] ERROR creating README.md: {e}")
+        size = os.fstat(fd).st_size
+        chunks = []
+        while True:
+            chunk = os.read(fd, max(size, 1))
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks).decode("utf-8")
+    finally:
+        os.close(fd)
+
+
+def _fast_write(path: Path, content: str) -> None:
+    """Overwrite a file with pre-encoded bytes via os.write."""
+    data = memoryview(content.encode("utf-8"))
+    fd = os.open(path, os.O_WRONLY | os.O_TRUNC | os.O_CREAT, 0o644)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+
+def _clean_tf_file(tf_file: Path, directory: Path) -> Set[str]:
+    """Apply the cleanup rewrites to one .tf file; returns the var. names it references."""
+    required_vars: Set[str] = set()
+    try:
+        st = tf_file.stat()
+        cached = _CLEAN_CACHE.get((str(directory), str(tf_file), st.st_mtime_ns, st.st_size))
+        if cached is not None:
+            return set(cached)
+    except OSError:
+        pass
+    print(f"[Terraformer] Processing {tf_file.relative_to(directory)}")
     
-    return 0 
+    try:
+        content = _fast_read(tf_file)
+        original_content = content
+        
+        # 1-3 in a single pass over the file (see _FUSED_RE): hardcoded
+        # account IDs -> data source, hardcoded regions -> variable,
+        # aliased provider references -> default provider
+        content = _FUSED_RE.sub(_fused_replacement, content)
+        
+        # 4. Remove lifecycle prevent_destroy that might block changes
+        content = _strip_lifecycle_prevent_destroy(content)
+        
+        # 5. Add proper variable references for common attributes
+        # Find all variable references and track them
+        required_vars.update(_VAR_RE.findall(content))
+        
+        # 6. If this is a provider.tf in a module, ensure it uses variables
+        if tf_file.name == "provider.tf" and tf_file.parent.parent != directory:
+            content = _MODULE_PROVIDER_TF
+        
+        # 7. Add data source for current account if ARNs are used
+        if "data.aws_caller_identity.current.account_id" in content:
+            if "data \"aws_caller_identity\" \"current\"" not in content:
+                content = 'data "aws_caller_identity" "current" {}\n\n' + content
+        
+        # Write back only if changed
+        if content != original_content:
+            _fast_write(tf_file, content)
+            print(f"[Terraformer] Updated {tf_file.relative_to(directory)}")
+            st = tf_file.stat()
+        _CLEAN_CACHE[(str(directory), str(tf_file), st.st_mtime_ns, st.st_size)] = frozenset(required_vars)
+            
+    except Exception as e:
+        print(f"[Terraformer] Error processing {tf_file}: {e}")
+    return required_vars
+
 
 def clean_terraform_files(directory: Path) -> None:
     """Clean up common issues in Terraformer-generated files."""
@@ -272,95 +448,14 @@ def clean_terraform_files(directory: Path) -> None:
     # Track all required variables across modules
     all_required_vars: Set[str] = set()
     
-    for tf_file in directory.rglob("*.tf"):
-        if tf_file.name in ["main.tf", "variables.tf", "backend.tf"]:
-            continue  # Skip root configuration files
-            
-        print(f"[Terraformer] Processing {tf_file.relative_to(directory)}")
-        
-        try:
-            content = tf_file.read_text()
-            original_content = content
-            
-            # 1. Remove hardcoded AWS account IDs and replace with data sources
-            content = re.sub(
-                r'arn:aws:([^:]+):([^:]+):(\d{12}):',
-                r'arn:aws:\1:\2:${data.aws_caller_identity.current.account_id}:',
-                content
-            )
-            
-            # 2. Remove hardcoded regions and use variables
-            content = re.sub(
-                r'(region\s*=\s*)"[a-z]{2}-[a-z]+-\d+"',
-                r'\1var.aws_region',
-                content
-            )
-            
-            # 3. Fix provider references in resources
-            content = re.sub(
-                r'provider\s*=\s*"aws\.[^"]*"',
-                'provider = aws',
-                content
-            )
-            
-            # 4. Remove lifecycle prevent_destroy that might block changes
-            content = re.sub(
-                r'lifecycle\s*\{[^}]*prevent_destroy\s*=\s*true[^}]*\}',
-                '',
-                content,
-                flags=re.DOTALL
-            )
-            
-            # 5. Add proper variable references for common attributes
-            # Find all variable references and track them
-            var_matches = re.findall(r'var\.(\w+)', content)
-            all_required_vars.update(var_matches)
-            
-            # 6. If this is a provider.tf in a module, ensure it uses variables
-            if tf_file.name == "provider.tf" and tf_file.parent.parent != directory:
-                content = '''terraform {
-  required_providers {
-    aws = {
-      source  = "hashicorp/aws"
-      version = "~> 5.0"
-    }
-  }
-}
-
-provider "aws" {
-  access_key = var.aws_access_key
-  secret_key = var.aws_secret_key
-  region     = var.aws_region
-}
-
-variable "aws_access_key" {
-  description = "AWS access key"
-  type        = string
-}
-
-variable "aws_secret_key" {
-  description = "AWS secret key"
-  type        = string
-}
-
-variable "aws_region" {
-  description = "AWS region"
-  type        = string
-}
-'''
-            
-            # 7. Add data source for current account if ARNs are used
-            if "data.aws_caller_identity.current.account_id" in content:
-                if "data \"aws_caller_identity\" \"current\"" not in content:
-                    content = 'data "aws_caller_identity" "current" {}\n\n' + content
-            
-            # Write back only if changed
-            if content != original_content:
-                tf_file.write_text(content)
-                print(f"[Terraformer] Updated {tf_file.relative_to(directory)}")
-                
-        except Exception as e:
-            print(f"[Terraformer] Error processing {tf_file}: {e}")
+    # Files are independent and the work is mostly I/O, so spread it over threads
+    tf_files = [
+        tf_file for tf_file in directory.rglob("*.tf")
+        if tf_file.name not in ["main.tf", "variables.tf", "backend.tf"]  # Skip root configuration files
+    ]
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+        for file_vars in pool.map(lambda tf_file: _clean_tf_file(tf_file, directory), tf_files):
+            all_required_vars.update(file_vars)
     
     # 8. Ensure all modules have required files
     for service_dir in directory.iterdir():
@@ -371,33 +466,4 @@ variable "aws_region" {
                     module_provider = region_dir / "provider.tf"
                     if not module_provider.exists():
                         print(f"[Terraformer] Creating provider.tf for {region_dir.relative_to(directory)}")
-                        module_provider.write_text('''terraform {
-  required_providers {
-    aws = {
-      source  = "hashicorp/aws"
-      version = "~> 5.0"
-    }
-  }
-}
-
-provider "aws" {
-  access_key = var.aws_access_key
-  secret_key = var.aws_secret_key
-  region     = var.aws_region
-}
-
-variable "aws_access_key" {
-  description = "AWS access key"
-  type        = string
-}
-
-variable "aws_secret_key" {
-  description = "AWS secret key"
-  type        = string
-}
-
-variable "aws_region" {
-  description = "AWS region"
-  type        = string
-}
-''') 
\ No newline at end of file
+                        module_provider.write_text(_MODULE_PROVIDER_TF) 
\ No newline at end of file
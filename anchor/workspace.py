@@ -1,12 +1,92 @@
+import atexit
+import heapq
 import json
+import shutil
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple
 import subprocess
 import os
+import sys
 
 from .terraform.executor import TerraformExecutor
-from .terraform.parser import plan_stats
+
+# Files whose contents feed terraform; the snapshot fingerprint tracks their
+# mtime and size, and only the presence of any other file
+FINGERPRINT_SUFFIXES = (".tf", ".tf.json", ".tfvars", ".tfvars.json")
+
+# Subtrees never walked by the workspace scan (hidden entries are skipped too);
+# they hold tooling or caches, not configuration
+SCAN_SKIP_DIRS = frozenset((".terraform", ".git", "node_modules", "__pycache__"))
+
+# Threads listing directories during the workspace scan; scandir releases the
+# GIL, so this pays off mostly on high-latency (network) filesystems
+SCAN_WORKERS = 8
+
+# Paths listed in the snapshot's directory_structure before it is truncated
+MAX_STRUCTURE_ENTRIES = 500
+# Entries listed per directory; the rest are summarized as a count
+DIR_LIST_CAP = 50
+
+
+def _stat_key(entry: os.DirEntry, rel: str) -> tuple:
+    """Fingerprint item for a file whose contents matter."""
+    try:
+        st = entry.stat()
+    except OSError:
+        # e.g. a dangling symlink
+        return (rel,)
+    return (rel, st.st_mtime_ns, st.st_size)
+
+
+def _read_main_tf(path: str) -> str:
+    """Read main.tf with raw os.read calls sized from fstat, no stat beforehand."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return "main.tf not found"
+    except OSError:
+        return "Error reading main.tf"
+    try:
+        size = os.fstat(fd).st_size
+        chunks = []
+        while True:
+            chunk = os.read(fd, max(size, 1))
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks).decode("utf-8")
+    except Exception:
+        return "Error reading main.tf"
+    finally:
+        os.close(fd)
+
+
+def _list_dir(path: str) -> List[os.DirEntry]:
+    """Entries of path in directory order ([] if unreadable), with Terraform inputs pre-stat'ed.
+
+    DirEntry caches its stat result, so stat'ing here moves that latency onto
+    the Workspace._scan worker threads as well.
+    """
+    # Probe first so unreadable directories skip the exception path
+    if not os.access(path, os.R_OK | os.X_OK):
+        return []
+    try:
+        # DirEntry carries the d_type from the directory read, so the
+        # is_dir check needs no extra stat per entry
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        # e.g. removed mid-walk
+        return []
+    for entry in entries:
+        if entry.name.endswith(FINGERPRINT_SUFFIXES) or entry.name == ".terraform.lock.hcl":
+            try:
+                entry.stat()
+            except OSError:
+                pass
+    return entries
 
 
 class Workspace:
@@ -14,65 +94,170 @@ class Workspace:
 
     def __init__(self, root: str):
         self.root = root
+        self.root_path = Path(root)
         self.tf = TerraformExecutor(root)
+        # (fingerprint, observation) of the last snapshot; see _scan
+        self._snapshot_cache: Optional[Tuple[FrozenSet[tuple], Dict[str, Any]]] = None
 
-    def _get_directory_structure(self, max_depth: int = 3) -> Dict[str, Any]:
-        """Get directory structure up to max_depth levels."""
-        structure = {}
-        root_path = Path(self.root)
-        
-        def build_tree(path: Path, current_depth: int = 0) -> Dict[str, Any]:
-            if current_depth >= max_depth:
-                return {}
-            
-            tree = {}
-            try:
-                for item in sorted(path.iterdir()):
-                    if item.name.startswith('.'):
-                        continue
-                    if item.is_dir():
-                        tree[item.name + '/'] = build_tree(item, current_depth + 1)
-                    else:
-                        tree[item.name] = 'file'
-            except PermissionError:
-                pass
-            return tree
+    def _scan(self, max_depth: int = 3, read_main_tf: bool = False) -> Tuple[str, FrozenSet[tuple], Optional[str]]:
+        """Walk the workspace once for the directory listing and a fingerprint.
+
+        The listing has one root-relative path per line, directories ending in
+        "/", down to max_depth levels. Each directory shows its first
+        DIR_LIST_CAP entries by name and the listing holds at most
+        MAX_STRUCTURE_ENTRIES paths, taken breadth-first; anything left out is
+        noted after the paths. The fingerprint covers every visible file, with
+        mtime and size for the Terraform inputs, regardless of depth or
+        truncation. With read_main_tf, the root main.tf found on the way is
+        read as well ("main.tf not found" if there is none).
+        """
+        fingerprint: List[tuple] = []
+        main_tf_content = "main.tf not found" if read_main_tf else None
+        lines: List[str] = []
+        notes: List[str] = []
+        truncated = False
+        # One breadth-first level at a time: the level's directories are listed
+        # concurrently, then consumed in order. Items are (path, path relative
+        # to root, whether the directory itself made it into the listing).
+        level = [(self.root, "", True)]
+        depth = 0
+        pool: Optional[ThreadPoolExecutor] = None
+        try:
+            while level:
+                if len(level) > 1 and pool is None:
+                    pool = ThreadPoolExecutor(max_workers=SCAN_WORKERS)
+                listings = (pool.map if pool else map)(_list_dir, [item[0] for item in level])
+                next_level = []
+                for (_, rel, listed), entries in zip(level, listings):
+                    # (entry, path relative to root, is directory); the path is
+                    # interned so the cached fingerprint then holds the very same
+                    # objects and comparing it with a fresh one is mostly identity
+                    # checks. A directory's path, with its "/", is both its
+                    # listing line and its children's prefix.
+                    visible = []
+                    for entry in entries:
+                        name = entry.name
+                        if name[:1] == '.':
+                            if depth == 0 and name == ".terraform.lock.hcl":
+                                fingerprint.append(_stat_key(entry, name))
+                            continue
+                        if name not in SCAN_SKIP_DIRS:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                            path = sys.intern(rel + name + '/' if is_dir else rel + name)
+                            visible.append((entry, path, is_dir))
+                    
+                    # Only the entries that can be shown are ordered; a
+                    # partial selection is linear in the directory size
+                    shown = set()
+                    if listed and depth < max_depth and not truncated:
+                        for entry, path, _ in heapq.nsmallest(DIR_LIST_CAP, visible, key=lambda item: item[0].name):
+                            if len(lines) == MAX_STRUCTURE_ENTRIES:
+                                truncated = True
+                                break
+                            shown.add(path)
+                            lines.append(path)
+                        if not truncated and len(visible) > DIR_LIST_CAP:
+                            notes.append(f"... {rel or './'} has {len(visible) - DIR_LIST_CAP} more entries")
+                    
+                    for entry, path, is_dir in visible:
+                        if is_dir:
+                            next_level.append((entry.path, path, path in shown))
+                            continue
+                        name = entry.name
+                        if name.endswith(FINGERPRINT_SUFFIXES):
+                            fingerprint.append(_stat_key(entry, path))
+                        else:
+                            fingerprint.append((path,))
+                        if read_main_tf and depth == 0 and name == "main.tf":
+                            main_tf_content = _read_main_tf(entry.path)
+                # Directories are few next to files; ordering them keeps the
+                # entry budget going to the same paths on every scan
+                next_level.sort(key=lambda item: item[1])
+                level = next_level
+                depth += 1
+        finally:
+            if pool is not None:
+                pool.shutdown()
         
-        return build_tree(root_path)
+        # Path order puts every directory's contents right after it
+        lines.sort()
+        lines.extend(notes)
+        if truncated:
+            lines.append("... (truncated)")
+        # A set, since directory order from scandir is not guaranteed stable
+        return "\n".join(lines), frozenset(fingerprint), main_tf_content
 
-    def _get_main_tf_content(self) -> str:
-        """Get the content of main.tf if it exists."""
-        main_tf = Path(self.root) / "main.tf"
-        if main_tf.exists():
-            try:
-                return main_tf.read_text()
-            except Exception:
-                return "Error reading main.tf"
-        return "main.tf not found"
+    def invalidate(self) -> None:
+        """Drop the cached snapshot, e.g. after changing state outside the files."""
+        self._snapshot_cache = None
 
     def snapshot(self) -> Dict[str, Any]:
         """Return observation dict for agent prompt."""
-        fmt_res = self.tf.fmt()
-        init_res = self.tf.init()
-        val_res = self.tf.validate()
-        plan_res = self.tf.plan()
-        plan_json = self.tf.show_plan_json().get("json", {}) if plan_res["returncode"] == 0 else {}
+        # An unchanged tree yields the same observation, so skip the terraform runs
+        _, fingerprint, _ = self._scan()
+        cached = self._snapshot_cache
+        if cached is not None and cached[0] == fingerprint:
+            return dict(cached[1])
         
+        # fmt -check is independent of everything; init mutates .terraform/ and must
+        # finish before validate and plan, which can then overlap each other.
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            fmt_future = pool.submit(self.tf.fmt)
+            init_res = self.tf.init()
+            if init_res["returncode"] != 0:
+                # validate and plan cannot succeed without init; report init's error in their place
+                val_res = plan_res = {
+                    "returncode": init_res["returncode"],
+                    "stdout": "",
+                    "stderr": f"terraform init failed:\n{init_res['stderr']}",
+                }
+                stats = {}
+            else:
+                val_future = pool.submit(self.tf.validate)
+                # The rendered diff is unused; stats come from the plan file
+                plan_res = self.tf.plan(keep_stdout=False)
+                # Only the add/change/destroy counts are used, so skip building the plan tree
+                stats = self.tf.show_plan_json(stats_only=True).get("stats", {}) if plan_res["returncode"] == 0 else {}
+                val_res = val_future.result()
+            fmt_res = fmt_future.result()
+        
+        # Rescan after the runs, which add tfplan and may update the lock file,
+        # so the stored fingerprint matches the tree the next call will see
+        structure, fingerprint, main_tf_content = self._scan(read_main_tf=True)
         # Add directory structure and main.tf content for better context
-        return {
-            "directory_structure": self._get_directory_structure(),
-            "main_tf_content": self._get_main_tf_content(),
+        observation = {
+            "directory_structure": structure,
+            "main_tf_content": main_tf_content,
             "fmt": fmt_res,
             "validate": val_res,
             "plan": {
                 "returncode": plan_res["returncode"],
-                "stderr": plan_res["stderr"][-2000:],
-                "stats": plan_stats(plan_json) if plan_json else {},
+                # Already capped to the tail by TerraformExecutor.plan
+                "stderr": plan_res["stderr"],
+                "stats": stats,
             },
         }
+        # A failed init may be transient (e.g. registry unreachable), so retry it next time
+        self._snapshot_cache = (fingerprint, observation) if init_res["returncode"] == 0 else None
+        # Callers get their own dict, so each snapshot stays a distinct object
+        return dict(observation)
 
     @classmethod
     def temp(cls, repo_path: str) -> "Workspace":
+        """Isolated workspace over a copy of repo_path in a new temp directory.
+
+        Every file is copied, so patches, deletes, `terraform fmt` and local
+        state only change the copy; symlinks inside the checkout are kept as
+        links. Tooling and cache directories (SCAN_SKIP_DIRS) are left out.
+        The directory is removed at interpreter exit.
+        """
         temp_dir = tempfile.mkdtemp(prefix="anchor_ws_")
-        # shallow copy / symlink? for now operate in place
-        return cls(repo_path) 
\ No newline at end of file
+        atexit.register(shutil.rmtree, temp_dir, ignore_errors=True)
+        shutil.copytree(
+            repo_path,
+            temp_dir,
+            symlinks=True,
+            ignore=shutil.ignore_patterns(*SCAN_SKIP_DIRS),
+            dirs_exist_ok=True,
+        )
+        return cls(temp_dir) 
\ No newline at end of file